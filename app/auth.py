@@ -1,31 +1,68 @@
 # backend/app/auth.py
-from datetime import datetime, timedelta
-from jose import JWTError, jwt
+from dataclasses import dataclass
+from datetime import timedelta
+from threading import Lock
+from cachetools import TLRUCache
 from passlib.context import CryptContext
+import hashlib
+import jwt
 import os
+import time
 
-PWD_CTX = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
+# argon2 for new hashes; existing pbkdf2_sha256 hashes still verify and are
+# upgraded on the next successful login.
+PWD_CTX = CryptContext(schemes=["argon2", "pbkdf2_sha256"], deprecated=["pbkdf2_sha256"])
 
 # Read secret from environment; fall back to a dev default
 SECRET_KEY = os.getenv("SECRET_KEY", "change-me-in-prod")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24
 
+# HMAC key bytes, prepared once instead of on every encode/decode
+_KEY = SECRET_KEY.encode("utf-8")
+
+# Decoded token payloads, keyed on a digest of the token. Entries live for at
+# most TOKEN_CACHE_TTL seconds and never past the token's own "exp".
+TOKEN_CACHE_TTL = 60
+
+def _token_ttu(key, payload, now):
+    return now + min(TOKEN_CACHE_TTL, payload["exp"] - time.time())
+
+_TOK_CACHE = TLRUCache(maxsize=10_000, ttu=_token_ttu)
+_TOK_LOCK = Lock()
+
+@dataclass(frozen=True)
+class Claims:
+    """Identity claims carried in a signed access token."""
+    user_id: int
+    username: str
+    is_admin: bool
+
 def verify_password(plain, hashed):
     return PWD_CTX.verify(plain, hashed)
 
+def verify_and_update_password(plain, hashed):
+    """Return (ok, new_hash); new_hash is set when the stored hash should be replaced."""
+    return PWD_CTX.verify_and_update(plain, hashed)
+
 def get_password_hash(password):
     return PWD_CTX.hash(password)
 
 def create_access_token(data: dict, expires_delta: timedelta = None):
-    to_encode = data.copy()
-    expire = datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
-    to_encode.update({"exp": expire})
-    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    ttl = int(expires_delta.total_seconds()) if expires_delta else ACCESS_TOKEN_EXPIRE_MINUTES * 60
+    return jwt.encode({**data, "exp": int(time.time()) + ttl}, _KEY, algorithm=ALGORITHM)
 
 def decode_token(token: str):
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    key = hashlib.sha256(token.encode()).digest()[:16]
+    with _TOK_LOCK:
+        payload = _TOK_CACHE.get(key)
+    if payload is not None:
         return payload
-    except JWTError:
+    try:
+        payload = jwt.decode(token, _KEY, algorithms=[ALGORITHM], options={"require": ["exp"]})
+    except jwt.InvalidTokenError:
         return None
+    if payload.get("exp", 0) - time.time() > 0:
+        with _TOK_LOCK:
+            _TOK_CACHE[key] = payload
+    return payload
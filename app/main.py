@@ -1,18 +1,22 @@
-from fastapi import FastAPI, WebSocket, Depends, HTTPException, status, Query, Request
+from fastapi import FastAPI, WebSocket, Depends, HTTPException, status, Query, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy import create_engine, desc
+from sqlalchemy import create_engine, desc, select, union_all
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import sessionmaker, Session
 from .models import Base, Question, User, Answer
 from .schemas import QuestionCreate, QuestionOut, UserCreate, UserLogin, Token, AnswerCreate, AnswerOut
-from .auth import create_access_token, get_password_hash, verify_password, decode_token
+from .auth import Claims, create_access_token, get_password_hash, verify_and_update_password, decode_token
 from .ws_manager import manager
 from typing import List, Optional
+from functools import lru_cache
+from collections import defaultdict
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
 security = HTTPBearer(auto_error=False)
 import os
 from dotenv import load_dotenv
 import logging
+import httpx
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -26,12 +30,25 @@ DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./test.db")
 WEBHOOK_URL = os.getenv("WEBHOOK_URL", "")
 ADMIN_SECRET = os.getenv("ADMIN_SECRET", "")
 
+# Hash checked on login misses to keep response timing uniform
+_DUMMY_HASH = get_password_hash("!invalid")
+
 # SQLAlchemy setup
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {}
-)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# SQLite picks its own pool class per URL, so pool sizing only applies to server databases
+if "sqlite" in DATABASE_URL:
+    engine_kwargs = {"connect_args": {"check_same_thread": False}}
+else:
+    engine_kwargs = {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", "20")),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "10")),
+        "pool_timeout": 30,
+        "pool_pre_ping": True,
+        "pool_recycle": 3600,
+    }
+engine = create_engine(DATABASE_URL, **engine_kwargs)
+# Objects stay loaded after commit; write paths read back what they just flushed
+# (primary key, Python defaults, and server defaults via eager_defaults) without an extra SELECT
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
 
 # FastAPI app
 app = FastAPI(
@@ -53,7 +70,32 @@ app.add_middleware(
 @app.on_event("startup")
 async def startup():
     Base.metadata.create_all(bind=engine)
+    # create_all skips indexes on tables that already exist; add any that are missing
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
     logger.info("Database tables created successfully")
+    manager.start()
+    # Exercise the JWT path once so the first real request doesn't pay for lazy imports;
+    # the password hash backend is already loaded by _DUMMY_HASH at import
+    decode_token(create_access_token({"user_id": 0, "username": "warmup", "is_admin": False}))
+    # Shared client so webhook calls reuse pooled connections
+    app.state.http = httpx.AsyncClient(
+        timeout=5,
+        limits=httpx.Limits(max_keepalive_connections=20, max_connections=100)
+    )
+
+@app.on_event("shutdown")
+async def shutdown():
+    await manager.stop()
+    await app.state.http.aclose()
+
+async def send_webhook(payload: dict):
+    """POST an event to WEBHOOK_URL; failures are logged, never raised"""
+    try:
+        await app.state.http.post(WEBHOOK_URL, json=payload)
+    except Exception as e:
+        logger.error(f"Webhook failed: {e}")
 
 # Dependency injection
 def get_db():
@@ -64,6 +106,18 @@ def get_db():
     finally:
         db.close()
 
+def find_user(db: Session, username: str, email: str) -> Optional[User]:
+    """Find a user by username or email.
+
+    Two single-column lookups joined with UNION ALL, so each side is a plain
+    index probe instead of an OR across both columns.
+    """
+    stmt = union_all(
+        select(User).where(User.username == username),
+        select(User).where(User.email == email)
+    ).limit(1)
+    return db.execute(select(User).from_statement(stmt)).scalars().first()
+
 def get_current_user(credentials: Optional[HTTPAuthorizationCredentials] = Depends(security), db: Session = Depends(get_db)):
     """Extract and validate user from Authorization header Bearer token"""
     if not credentials:
@@ -80,34 +134,30 @@ def get_current_user(credentials: Optional[HTTPAuthorizationCredentials] = Depen
         logger.error(f"Token validation error: {e}")
         return None
 
+def get_current_claims(credentials: Optional[HTTPAuthorizationCredentials] = Depends(security)):
+    """Return the signed claims from the Bearer token without touching the database"""
+    if not credentials:
+        return None
+    data = decode_token(credentials.credentials)
+    if not data:
+        return None
+    return Claims(
+        user_id=data.get("user_id"),
+        username=data.get("username"),
+        is_admin=bool(data.get("is_admin"))
+    )
+
 # ==================== Authentication Endpoints ====================
 
 @app.post("/register", response_model=Token, tags=["Auth"])
-async def register(request: Request, db: Session = Depends(get_db)):
+def register(user_in: UserCreate, db: Session = Depends(get_db)):
     """
     Register a new user.
     - Returns JWT access token on success
     """
     try:
-        # Read raw body for debugging and parsing
-        body_bytes = await request.body()
-        try:
-            raw = body_bytes.decode("utf-8") if body_bytes else ""
-        except Exception:
-            raw = str(body_bytes)
-        logger.info(f"Register raw body: {raw}")
-
-        # attempt to parse JSON body
-        import json
-        payload = json.loads(raw)
-
-        # Validate payload against schema
-        user_in = UserCreate(**payload)
-
         # Check if user already exists
-        existing = db.query(User).filter(
-            (User.username == user_in.username) | (User.email == user_in.email)
-        ).first()
+        existing = find_user(db, user_in.username, user_in.email)
         
         if existing:
             raise HTTPException(
@@ -132,7 +182,6 @@ async def register(request: Request, db: Session = Depends(get_db)):
         )
         db.add(user)
         db.commit()
-        db.refresh(user)
 
         # Generate token (include is_admin)
         token = create_access_token({"user_id": user.user_id, "username": user.username, "is_admin": user.is_admin})
@@ -142,18 +191,7 @@ async def register(request: Request, db: Session = Depends(get_db)):
     except HTTPException:
         raise
     except Exception as e:
-        import traceback
-        tb = traceback.format_exc()
-        logger.error(f"Unhandled error in /register: {e}\n{tb}")
-        # Persist error details to a file for easier inspection
-        try:
-            with open("./register_error.log", "a", encoding="utf-8") as f:
-                f.write("--- /register error ---\n")
-                f.write(f"raw_body: {raw}\n")
-                f.write(f"error: {e}\n")
-                f.write(tb + "\n")
-        except Exception:
-            logger.error("Failed to write register_error.log")
+        logger.exception(f"Unhandled error in /register: {e}")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal server error")
 
 @app.post("/login", response_model=Token, tags=["Auth"])
@@ -163,15 +201,21 @@ def login(credentials: UserLogin, db: Session = Depends(get_db)):
     - Returns JWT access token on success
     """
     # Find user by username or email
-    user = db.query(User).filter(
-        (User.username == credentials.username) | (User.email == credentials.username)
-    ).first()
+    user = find_user(db, credentials.username, credentials.username)
     
-    if not user or not verify_password(credentials.password, user.password_hash):
+    # Always verify against some hash so unknown usernames take as long as known ones
+    hashed = user.password_hash if user else _DUMMY_HASH
+    ok, new_hash = verify_and_update_password(credentials.password, hashed)
+    if not user or not ok:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid username/email or password"
         )
+
+    # Rehash legacy pbkdf2 passwords with the current scheme
+    if new_hash:
+        user.password_hash = new_hash
+        db.commit()
     
     # Generate token
     token = create_access_token({
@@ -208,7 +252,6 @@ async def submit_question(q: QuestionCreate, db: Session = Depends(get_db)):
     question = Question(message=q.message.strip())
     db.add(question)
     db.commit()
-    db.refresh(question)
     
     # Broadcast new question to all connected clients
     await manager.broadcast({
@@ -227,27 +270,59 @@ async def submit_question(q: QuestionCreate, db: Session = Depends(get_db)):
     logger.info(f"New question submitted: {question.question_id}")
     return question
 
-@app.get("/questions", response_model=List[QuestionOut], tags=["Questions"])
+# Rows come straight from our own table, so skip response validation and only document the shape
+@app.get("/questions", response_model=None, responses={200: {"model": List[QuestionOut]}}, tags=["Questions"])
 def list_questions(
     db: Session = Depends(get_db),
-    status_filter: Optional[str] = Query(None, description="Filter by status: Pending, Escalated, Answered")
+    status_filter: Optional[str] = Query(None, description="Filter by status: Pending, Escalated, Answered"),
+    limit: int = Query(50, ge=1, le=200, description="Maximum number of questions to return"),
+    offset: int = Query(0, ge=0, description="Number of questions to skip")
 ):
     """
-    Get all questions, ordered by escalated status then timestamp (newest first).
+    Get questions, ordered by escalated status then timestamp (newest first).
     - Escalated questions appear first
     - Optional filter by status
+    - Paginated with limit/offset
     """
-    query = db.query(Question)
+    stmt = select(
+        Question.question_id,
+        Question.user_id,
+        Question.message,
+        Question.timestamp,
+        Question.status,
+        Question.escalated,
+        Question.answered_by
+    )
     
     if status_filter:
-        query = query.filter(Question.status == status_filter)
+        stmt = stmt.where(Question.status == status_filter)
     
-    questions = query.order_by(
+    stmt = stmt.order_by(
         Question.escalated.desc(),
         desc(Question.timestamp)
-    ).all()
+    ).limit(limit).offset(offset)
+    
+    rows = db.execute(stmt).mappings().all()
+    
+    # Load answers for the whole page in one IN (...) query rather than one per question
+    answers = defaultdict(list)
+    if rows:
+        answer_stmt = select(
+            Answer.answer_id,
+            Answer.question_id,
+            Answer.author_id,
+            Answer.content,
+            Answer.timestamp
+        ).where(
+            Answer.question_id.in_([row["question_id"] for row in rows])
+        ).order_by(Answer.answer_id)
+        for a in db.execute(answer_stmt).mappings():
+            answers[a["question_id"]].append(AnswerOut.model_construct(**a))
     
-    return questions
+    return [
+        QuestionOut.model_construct(**row, answers=answers[row["question_id"]])
+        for row in rows
+    ]
 
 @app.get("/questions/{question_id}", response_model=QuestionOut, tags=["Questions"])
 def get_question(question_id: int, db: Session = Depends(get_db)):
@@ -273,7 +348,6 @@ async def create_answer(question_id: int, payload: AnswerCreate, user: Optional[
     answer = Answer(question_id=question_id, content=payload.content, author_id=(user.user_id if user else None))
     db.add(answer)
     db.commit()
-    db.refresh(answer)
 
     # Broadcast new answer to websocket clients
     try:
@@ -292,7 +366,7 @@ async def create_answer(question_id: int, payload: AnswerCreate, user: Optional[
     return answer
 
 @app.post("/questions/{question_id}/answer", tags=["Questions"])
-async def answer_question(question_id: int, user: Optional[User] = Depends(get_current_user), db: Session = Depends(get_db)):
+async def answer_question(question_id: int, background_tasks: BackgroundTasks, claims: Optional[Claims] = Depends(get_current_claims), db: Session = Depends(get_db)):
     """
     Mark a question as answered (admin only).
     - Only logged-in admins can perform this action
@@ -307,7 +381,7 @@ async def answer_question(question_id: int, user: Optional[User] = Depends(get_c
         )
     
     # Check if user is admin
-    if not user or not user.is_admin:
+    if not claims or not claims.is_admin:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Only admins can mark questions as answered"
@@ -315,9 +389,16 @@ async def answer_question(question_id: int, user: Optional[User] = Depends(get_c
     
     # Update question
     question.status = "Answered"
-    question.answered_by = user.user_id
-    db.commit()
-    db.refresh(question)
+    question.answered_by = claims.user_id
+    try:
+        db.commit()
+    except IntegrityError:
+        # Claims are trusted without a lookup, so a token can outlive its user
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated"
+        )
     
     # Broadcast update
     await manager.broadcast({
@@ -329,19 +410,15 @@ async def answer_question(question_id: int, user: Optional[User] = Depends(get_c
         }
     })
     
-    # Optional: Send webhook notification
+    # Optional: Send webhook notification after the response is sent
     if WEBHOOK_URL:
-        try:
-            import httpx
-            await httpx.AsyncClient().post(WEBHOOK_URL, json={
-                "question_id": question.question_id,
-                "event": "answered",
-                "answered_by": user.username
-            })
-        except Exception as e:
-            logger.error(f"Webhook failed: {e}")
+        background_tasks.add_task(send_webhook, {
+            "question_id": question.question_id,
+            "event": "answered",
+            "answered_by": claims.username
+        })
     
-    logger.info(f"Question {question_id} marked as answered by {user.username}")
+    logger.info(f"Question {question_id} marked as answered by {claims.username}")
     return {"detail": "Question marked as answered"}
 
 @app.post("/questions/{question_id}/escalate", tags=["Questions"])
@@ -368,7 +445,6 @@ async def escalate_question(question_id: int, db: Session = Depends(get_db)):
     question.escalated = True
     question.status = "Escalated"
     db.commit()
-    db.refresh(question)
     
     # Broadcast update
     await manager.broadcast({
@@ -413,6 +489,25 @@ def health_check():
     return {"status": "healthy", "service": "Hemut Q&A Dashboard"}
 
 
+@lru_cache(maxsize=4096)
+def _mock_suggestions(q_display: str) -> tuple:
+    """Build the mocked suggestions for a (truncated) question; cached since output is deterministic"""
+    # Mocked suggestions - in a real RAG system this would call a retriever + generator
+    return (
+        {
+            "id": "s1",
+            "text": f"Short answer: You can reset your password by visiting Settings > Password and following the prompts. If you use OAuth, follow provider-specific steps. (Context-aware suggestion for: {q_display})",
+            "confidence": 0.86,
+            "source": "mock_kb:reset_password"
+        },
+        {
+            "id": "s2",
+            "text": f"Step-by-step: 1) Go to your profile. 2) Click 'Change password'. 3) Enter current and new password. 4) Confirm via email if required. (Suggested for: {q_display})",
+            "confidence": 0.78,
+            "source": "mock_kb:howto_reset"
+        }
+    )
+
 @app.post("/suggest", tags=["RAG"])
 def suggest_answer(payload: dict):
     """
@@ -425,21 +520,7 @@ def suggest_answer(payload: dict):
         if not q or not str(q).strip():
             raise HTTPException(status_code=400, detail="question is required")
 
-        # Mocked suggestions - in a real RAG system this would call a retriever + generator
-        suggestions = [
-            {
-                "id": "s1",
-                "text": f"Short answer: You can reset your password by visiting Settings > Password and following the prompts. If you use OAuth, follow provider-specific steps. (Context-aware suggestion for: {q[:80]})",
-                "confidence": 0.86,
-                "source": "mock_kb:reset_password"
-            },
-            {
-                "id": "s2",
-                "text": f"Step-by-step: 1) Go to your profile. 2) Click 'Change password'. 3) Enter current and new password. 4) Confirm via email if required. (Suggested for: {q[:80]})",
-                "confidence": 0.78,
-                "source": "mock_kb:howto_reset"
-            }
-        ]
+        suggestions = list(_mock_suggestions(str(q)[:80]))
 
         return {"question": q, "suggestions": suggestions}
     except HTTPException:
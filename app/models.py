@@ -1,5 +1,5 @@
 # backend/app/models.py
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, Index
 from sqlalchemy.sql import func
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
@@ -16,6 +16,8 @@ class User(Base):
 
 class Question(Base):
     __tablename__ = "questions"
+    # Fetch server defaults (timestamp) on INSERT via RETURNING instead of a later refresh()
+    __mapper_args__ = {"eager_defaults": True}
     question_id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.user_id"), nullable=True)
     message = Column(Text, nullable=False)
@@ -26,9 +28,13 @@ class Question(Base):
     # Relationship for answers
     answers = relationship("Answer", backref="question", cascade="all, delete-orphan")
 
+# Matches the default ordering of the question list
+Index("ix_q_escalated_ts", Question.escalated.desc(), Question.timestamp.desc())
+
 
 class Answer(Base):
     __tablename__ = "answers"
+    __mapper_args__ = {"eager_defaults": True}
     answer_id = Column(Integer, primary_key=True, index=True)
     question_id = Column(Integer, ForeignKey("questions.question_id"), nullable=False)
     author_id = Column(Integer, ForeignKey("users.user_id"), nullable=True)
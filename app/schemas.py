@@ -1,5 +1,5 @@
 # backend/app/schemas.py
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Optional
 from datetime import datetime
 from typing import List
@@ -7,7 +7,24 @@ from typing import List
 class QuestionCreate(BaseModel):
     message: str = Field(..., min_length=1)
 
+class AnswerCreate(BaseModel):
+    content: str = Field(..., min_length=1)
+
+
+# Defined before QuestionOut so every model builds at import, without forward refs
+class AnswerOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    answer_id: int
+    question_id: int
+    author_id: Optional[int]
+    content: str
+    timestamp: datetime
+
+
 class QuestionOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     question_id: int
     user_id: Optional[int]
     message: str
@@ -15,10 +32,7 @@ class QuestionOut(BaseModel):
     status: str
     escalated: bool
     answered_by: Optional[int]
-    answers: List["AnswerOut"] = []
-
-    class Config:
-        from_attributes = True
+    answers: List[AnswerOut] = []
 
 class UserCreate(BaseModel):
     username: str
@@ -33,22 +47,3 @@ class UserLogin(BaseModel):
 class Token(BaseModel):
     access_token: str
     token_type: str = "bearer"
-
-
-class AnswerCreate(BaseModel):
-    content: str = Field(..., min_length=1)
-
-
-class AnswerOut(BaseModel):
-    answer_id: int
-    question_id: int
-    author_id: Optional[int]
-    content: str
-    timestamp: datetime
-
-    class Config:
-        from_attributes = True
-
-
-# Pydantic forward refs
-QuestionOut.update_forward_refs()
@@ -1,28 +1,94 @@
 # backend/app/ws_manager.py
-from typing import List
+import asyncio
+import logging
+from typing import Optional, Set
 from fastapi import WebSocket
+import orjson
+
+logger = logging.getLogger(__name__)
+
+# Most events coalesced into a single frame by the fanout worker
+MAX_BATCH = 64
+# Pending events held for the worker before new ones are dropped
+QUEUE_MAXSIZE = 1000
+# Seconds a single client send may take before that client is dropped
+SEND_TIMEOUT = 5
 
 class ConnectionManager:
     def __init__(self):
-        self.active_connections: List[WebSocket] = []
+        self.active_connections: Set[WebSocket] = set()
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Start the fanout worker; call from the app's startup hook."""
+        self._queue = asyncio.Queue(maxsize=QUEUE_MAXSIZE)
+        self._worker = asyncio.create_task(self._fanout_loop())
+
+    async def stop(self):
+        if self._queue is not None and not self._queue.empty():
+            logger.warning(f"Dropping {self._queue.qsize()} undelivered WebSocket events on shutdown")
+        if self._worker:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+        self._worker = None
+        self._queue = None
 
     async def connect(self, websocket: WebSocket):
         await websocket.accept()
-        self.active_connections.append(websocket)
+        self.active_connections.add(websocket)
 
     def disconnect(self, websocket: WebSocket):
-        if websocket in self.active_connections:
-            self.active_connections.remove(websocket)
+        self.active_connections.discard(websocket)
 
     async def broadcast(self, message: dict):
-        living = []
-        for conn in list(self.active_connections):
+        # hand off to the fanout worker; send inline if it isn't running
+        if self._queue is None:
+            await self._send_all(message)
+        else:
+            try:
+                self._queue.put_nowait(message)
+            except asyncio.QueueFull:
+                logger.warning(f"WebSocket broadcast queue full; dropping {message.get('type')} event")
+
+    async def _fanout_loop(self):
+        while True:
+            messages = [await self._queue.get()]
+            while len(messages) < MAX_BATCH and not self._queue.empty():
+                messages.append(self._queue.get_nowait())
+            # a lone event goes out unchanged; bursts share one {"type": "batch"} frame
+            frame = messages[0] if len(messages) == 1 else {"type": "batch", "events": messages}
+            try:
+                await self._send_all(frame)
+            except Exception as e:
+                logger.error(f"WebSocket fanout failed: {e}")
+
+    async def _send_all(self, message: dict):
+        # serialize once and share the frame across all connections
+        data = orjson.dumps(message).decode("utf-8")
+
+        async def _send(conn: WebSocket):
             try:
-                await conn.send_json(message)
-                living.append(conn)
+                # a stalled client must not hold up delivery to everyone else
+                await asyncio.wait_for(conn.send_text(data), SEND_TIMEOUT)
+                return None
             except Exception:
-                # drop bad connection
-                pass
-        self.active_connections = living
+                await self._close(conn)
+                return conn
+
+        # send to every client concurrently so one slow socket doesn't hold up the rest
+        results = await asyncio.gather(*(_send(c) for c in list(self.active_connections)))
+        # drop bad connections, keeping any that connected during the send
+        self.active_connections -= {c for c in results if c is not None}
+
+    async def _close(self, conn: WebSocket):
+        # close dropped clients so they notice and reconnect instead of silently missing events
+        try:
+            await asyncio.wait_for(conn.close(code=1011), SEND_TIMEOUT)
+        except Exception:
+            pass
 
 manager = ConnectionManager()
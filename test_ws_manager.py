@@ -0,0 +1,75 @@
+"""Tests for the WebSocket fanout in app/ws_manager.py, using fake sockets."""
+import asyncio
+
+from app import ws_manager
+from app.ws_manager import ConnectionManager
+
+
+class FakeSocket:
+    def __init__(self, send_delay=0, fail=False):
+        self.send_delay = send_delay
+        self.fail = fail
+        self.sent = []
+        self.close_code = None
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, data):
+        if self.fail:
+            raise RuntimeError("send failed")
+        await asyncio.sleep(self.send_delay)
+        self.sent.append(data)
+
+    async def close(self, code=1000):
+        self.close_code = code
+
+
+def test_slow_client_is_closed_and_dropped(monkeypatch):
+    monkeypatch.setattr(ws_manager, "SEND_TIMEOUT", 0.05)
+
+    async def run():
+        manager = ConnectionManager()
+        fast, slow = FakeSocket(), FakeSocket(send_delay=1)
+        await manager.connect(fast)
+        await manager.connect(slow)
+        await manager.broadcast({"type": "new_question"})
+        return manager, fast, slow
+
+    manager, fast, slow = asyncio.run(run())
+    assert fast.sent == ['{"type":"new_question"}']
+    assert fast.close_code is None
+    assert slow.close_code == 1011
+    assert manager.active_connections == {fast}
+
+
+def test_failed_client_is_closed_and_dropped():
+    async def run():
+        manager = ConnectionManager()
+        broken = FakeSocket(fail=True)
+        await manager.connect(broken)
+        await manager.broadcast({"type": "new_question"})
+        return manager, broken
+
+    manager, broken = asyncio.run(run())
+    assert broken.close_code == 1011
+    assert manager.active_connections == set()
+
+
+def test_worker_batches_queued_events():
+    async def run():
+        manager = ConnectionManager()
+        client = FakeSocket()
+        await manager.connect(client)
+        manager.start()
+        for i in range(3):
+            await manager.broadcast({"type": "question_updated", "i": i})
+        await asyncio.sleep(0.05)
+        await manager.stop()
+        return client
+
+    client = asyncio.run(run())
+    assert client.sent == [
+        '{"type":"batch","events":[{"type":"question_updated","i":0},'
+        '{"type":"question_updated","i":1},{"type":"question_updated","i":2}]}'
+    ]